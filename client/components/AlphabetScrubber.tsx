@@ -87,7 +87,7 @@ const AlphabetScrubber: React.FC<AlphabetScrubberProps> = ({ onScrollTo, classNa
         onMouseLeave={onMouseUp}
       >
          {ALPHABET.map((char, i) => (
-             <div key={i} className="w-1 h-1 rounded-full bg-gray-400/50" />
+             <div key={i} data-testid={`scrub-${char}`} className="w-1 h-1 rounded-full bg-gray-400/50" />
          ))}
       </div>
 
@@ -0,0 +1,28 @@
+
+import asyncio
+import sys
+
+import verify_features
+import verify_login_v2
+from verify_shared import AUTH_STATE, close_browser
+
+async def run(use_saved_auth=False):
+    # Both flows pull the same Chromium from verify_shared.get_browser();
+    # each still opens its own context so storage stays isolated.
+    try:
+        if use_saved_auth:
+            # Explicit opt-in: skip registration and reuse whatever auth.json holds
+            await verify_features.run(AUTH_STATE)
+            return
+
+        # Log in once and hand the captured state straight to the feature checks
+        state = await verify_login_v2.run()
+        if state is None:
+            print("❌ Login flow failed; skipping feature checks. Rerun with --use-saved-auth to test against auth.json.")
+            return
+        await verify_features.run(state)
+    finally:
+        await close_browser()
+
+if __name__ == "__main__":
+    asyncio.run(run(use_saved_auth="--use-saved-auth" in sys.argv[1:]))
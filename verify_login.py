@@ -1,14 +1,16 @@
 
 import asyncio
-import json
 import random
 import time
-from playwright.async_api import async_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+from verify_shared import AUTH_STATE, LOGGED_IN_SELECTOR, fill_fields, new_context
 
 async def run():
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
+        context = await new_context(
+            browser,
             viewport={'width': 1280, 'height': 720},
             user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         )
@@ -25,24 +27,28 @@ async def run():
         # 1. Register a new user
         print("Starting registration...")
         # Check if we are on the welcome screen or registration/login screen
-        if await page.is_visible("text=Start Free 30-Day Trial"):
-            await page.click("text=Start Free 30-Day Trial")
+        # click() already waits for visible+enabled, so no is_visible() precheck
+        try:
+            await page.click("text=Start Free 30-Day Trial", timeout=2000)
+        except PlaywrightTimeoutError:
+            pass
 
         # Fill registration form
         email = f"test_auto_{int(time.time())}_{random.randint(1000, 9999)}@example.com"
         print(f"Registering with email: {email}")
 
-        await page.fill('input[placeholder="Enter your business name"]', "Test Shop")
-        await page.fill('input[placeholder="Enter your phone number"]', "08012345678")
-        await page.fill('input[placeholder="Enter your email address (optional)"]', email) # It seems to be optional in placeholder but let's see
-        await page.fill('textarea[placeholder="Enter your shop address"]', "123 Lagos Street")
-
         # Handling the password fields - might need to be specific if there are multiple password inputs
         # Assuming the order is owner pin then staff pin based on typical flows
+        await page.wait_for_selector('input[placeholder="Enter your business name"]')
         password_inputs = await page.query_selector_all('input[type="password"]')
         if len(password_inputs) >= 2:
-            await password_inputs[0].fill("1234") # Owner PIN
-            await password_inputs[1].fill("1234") # Staff PIN
+            await fill_fields(page, {
+                'input[placeholder="Enter your business name"]': "Test Shop",
+                'input[placeholder="Enter your phone number"]': "08012345678",
+                'input[placeholder="Enter your email address (optional)"]': email, # It seems to be optional in placeholder but let's see
+                'textarea[placeholder="Enter your shop address"]': "123 Lagos Street",
+                'input[type="password"]': ["1234", "1234"], # Owner PIN, Staff PIN
+            })
         else:
              print("Could not find password inputs")
              await page.screenshot(path="registration_fail.png")
@@ -55,7 +61,9 @@ async def run():
         try:
              # Wait for either the dashboard/sales screen or verification screen
              # Based on code, it might go to verification screen first if email is provided
-             await page.wait_for_timeout(5000)
+             await page.locator("text=Verify Your Email").or_(
+                 page.locator('input[placeholder="Enter PIN"]')
+             ).or_(page.locator(LOGGED_IN_SELECTOR)).first.wait_for(timeout=10000)
 
              # Check for verification screen
              if await page.is_visible("text=Verify Your Email"):
@@ -72,11 +80,11 @@ async def run():
                  await page.click('button:has-text("Login")')
 
              # Wait for main app
-             await page.wait_for_selector('text=Sales', timeout=10000)
+             await page.wait_for_selector(LOGGED_IN_SELECTOR, timeout=10000)
              print("Successfully logged in!")
 
              # Save storage state for future tests
-             await context.storage_state(path="auth.json")
+             await context.storage_state(path=AUTH_STATE)
              print("Saved auth state to auth.json")
 
         except Exception as e:
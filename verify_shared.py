@@ -0,0 +1,104 @@
+
+from playwright.async_api import async_playwright
+
+# Auth state written by the login flow and reused by every other verifier
+AUTH_STATE = "auth.json"
+
+# The sidebar nav only renders once the app is logged in (App.tsx). Unquoted
+# text=Sales is no good here: it also matches registration copy ("record sales").
+LOGGED_IN_SELECTOR = "aside nav"
+
+# Resources the checks never assert on; skipping them speeds up page loads.
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_HOSTS = ("fonts.googleapis.com", "fonts.gstatic.com", "analytics.tiktok.com", "google-analytics", "googletagmanager")
+
+async def block_heavy_resources(route):
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(h in request.url for h in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# Zero out CSS animations/transitions so elements are stable as soon as they render.
+DISABLE_ANIMATIONS_SCRIPT = """
+const style = document.createElement('style');
+style.textContent = '*, *::before, *::after { animation-duration: 0s !important; animation-delay: 0s !important; transition-duration: 0s !important; transition-delay: 0s !important; scroll-behavior: auto !important; }';
+const attach = () => (document.head || document.documentElement).appendChild(style);
+if (document.documentElement) attach(); else document.addEventListener('DOMContentLoaded', attach);
+"""
+
+# Headless CI never needs GPU, extensions or background services
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--disable-translate",
+    "--mute-audio",
+]
+
+# Fail fast when a selector is wrong instead of sitting out Playwright's 30s defaults
+DEFAULT_TIMEOUT = 7000
+DEFAULT_NAVIGATION_TIMEOUT = 15000
+
+_playwright = None
+_browser = None
+
+async def get_browser():
+    # Launch Chromium on first use and hand the same instance to every script
+    global _playwright, _browser
+    if _browser is None:
+        _playwright = await async_playwright().start()
+        _browser = await _playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+    return _browser
+
+async def close_browser():
+    global _playwright, _browser
+    if _browser is not None:
+        await _browser.close()
+        _browser = None
+    if _playwright is not None:
+        await _playwright.stop()
+        _playwright = None
+
+async def new_context(browser, **kwargs):
+    # No retina rendering unless a caller asks for it
+    kwargs.setdefault("device_scale_factor", 1)
+    context = await browser.new_context(**kwargs)
+    context.set_default_timeout(DEFAULT_TIMEOUT)
+    context.set_default_navigation_timeout(DEFAULT_NAVIGATION_TIMEOUT)
+    await context.route("**/*", block_heavy_resources)
+    await context.add_init_script(DISABLE_ANIMATIONS_SCRIPT)
+    return context
+
+# Matches the fields FILL_FIELDS_SCRIPT treats as editable; use it to count a selector's targets
+EDITABLE = ":visible:enabled:not([readonly])"
+
+# Sets values through the native setter plus an input event so React state updates.
+# Like page.fill, only visible, enabled, editable fields count as matches.
+# A string fills the first match; a list fills successive matches in order.
+FILL_FIELDS_SCRIPT = """
+(fields) => {
+  const editable = (el) => el.getClientRects().length > 0
+    && getComputedStyle(el).visibility !== 'hidden'
+    && !el.disabled && !el.readOnly;
+  for (const [selector, value] of fields) {
+    const values = Array.isArray(value) ? value : [value];
+    const elements = Array.from(document.querySelectorAll(selector)).filter(editable);
+    if (elements.length < values.length) throw new Error(`Not enough editable fields match ${selector}`);
+    values.forEach((v, i) => {
+      const el = elements[i];
+      const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+      Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, v);
+      el.dispatchEvent(new Event('input', { bubbles: true }));
+    });
+  }
+}
+"""
+
+async def fill_fields(page, fields):
+    # Fill a whole form in one round trip instead of one fill() per field
+    await page.wait_for_selector(next(iter(fields)))
+    await page.evaluate(FILL_FIELDS_SCRIPT, list(fields.items()))